@@ -0,0 +1,94 @@
+"""
+Response cache for deterministic LLM completions.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Any, Dict, Optional, Protocol
+
+import orjson
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Storage backend for serialized cache entries"""
+
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    async def set(self, key: str, value: str) -> None:
+        ...
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, ttl: int, maxsize: int = 1024):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        self._cache[key] = value
+
+
+class RedisCacheBackend:
+    """Redis cache shared between workers"""
+
+    def __init__(self, url: str, ttl: int):
+        # Imported lazily so redis is only required when configured
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._ttl = ttl
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self._redis.get(key)
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str) -> None:
+        await self._redis.set(key, value, ex=self._ttl)
+
+
+class LLMCache:
+    """Exact-match cache for chat completion results"""
+
+    # Only (near-)deterministic generations are worth replaying
+    MAX_CACHEABLE_TEMPERATURE = 0.1
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        ttl = int(os.getenv("LLM_CACHE_TTL", 3600))
+        if backend is None:
+            redis_url = os.getenv("REDIS_URL")
+            backend = RedisCacheBackend(redis_url, ttl) if redis_url else MemoryCacheBackend(ttl)
+        self.backend = backend
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """Check whether a completion with this temperature may be cached"""
+        return temperature <= self.MAX_CACHEABLE_TEMPERATURE
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Build a stable SHA-256 key from the request parameters"""
+        payload = orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for key, if any"""
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning("LLM cache lookup failed: %s", e)
+            return None
+        return orjson.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store an entry; cache failures never break the request"""
+        try:
+            await self.backend.set(key, orjson.dumps(value).decode())
+        except Exception as e:
+            logger.warning("LLM cache store failed: %s", e)
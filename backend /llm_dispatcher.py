@@ -0,0 +1,85 @@
+"""
+Concurrent LLM request dispatch under OpenAI rate limits.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Sequence, Tuple
+
+
+class TokenBucket:
+    """Leaky bucket that refills continuously up to a per-minute capacity"""
+
+    def __init__(self, capacity_per_minute: float):
+        self.capacity = capacity_per_minute
+        self._available = capacity_per_minute
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._available = min(self.capacity, self._available + elapsed * self.capacity / 60)
+        self._last_refill = now
+
+    async def acquire(self, amount: float) -> None:
+        """Wait until amount units are available and consume them"""
+        # A request larger than the whole bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+
+        # Waiters are served in order; the lock is held while sleeping so a
+        # large request is not starved by a stream of small ones
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._available >= amount:
+                    self._available -= amount
+                    return
+                await asyncio.sleep((amount - self._available) * 60 / self.capacity)
+
+
+class ParallelLLMDispatcher:
+    """
+    Run many LLM calls concurrently within requests- and tokens-per-minute limits
+
+    Modeled on openai-cookbook's api_request_parallel_processor: every call
+    takes one request and its estimated tokens from the buckets before it is
+    sent. Calls are not retried here; they are expected to retry on their own.
+    """
+
+    def __init__(self, max_requests_per_minute: float, max_tokens_per_minute: float):
+        self.rpm_bucket = TokenBucket(max_requests_per_minute)
+        self.tpm_bucket = TokenBucket(max_tokens_per_minute)
+
+    async def run_many(
+        self,
+        calls: Sequence[Tuple[Callable[[], Awaitable[Any]], int]],
+        max_concurrent: int = 20
+    ) -> List[Any]:
+        """
+        Run calls concurrently
+
+        Args:
+            calls: (factory, estimated_tokens) pairs; each factory is invoked
+                once its budget is available
+            max_concurrent: Maximum number of calls in flight
+
+        Returns:
+            Results in call order; a call that failed for good yields its exception
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+        return await asyncio.gather(
+            *(self._run_one(factory, tokens, semaphore) for factory, tokens in calls),
+            return_exceptions=True
+        )
+
+    async def _run_one(
+        self,
+        factory: Callable[[], Awaitable[Any]],
+        estimated_tokens: int,
+        semaphore: asyncio.Semaphore
+    ) -> Any:
+        async with semaphore:
+            await self.rpm_bucket.acquire(1)
+            await self.tpm_bucket.acquire(estimated_tokens)
+            return await factory()
@@ -0,0 +1,111 @@
+"""
+Retry and circuit breaker policies for OpenAI calls.
+"""
+
+import logging
+import time
+from typing import Optional
+
+import openai
+from tenacity import RetryCallState
+from tenacity.wait import wait_base
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: rate limits, dropped connections, timeouts and 5xx
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class ServiceBusyError(ValueError):
+    """Raised instead of calling OpenAI while the circuit breaker is open"""
+
+
+class wait_retry_after(wait_base):
+    """
+    Wait for the server's Retry-After hint when given, else use the fallback wait
+
+    OpenAI sends retry-after-ms / retry-after on 429 responses; honoring them
+    avoids retrying before the rate limit window has actually reset.
+    """
+
+    def __init__(self, fallback: wait_base, max_wait: float = 60.0):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        exception = retry_state.outcome.exception() if retry_state.outcome else None
+        response = getattr(exception, "response", None)
+        if response is not None:
+            delay = self._retry_after(response.headers)
+            if delay is not None:
+                return min(delay, self.max_wait)
+        return self.fallback(retry_state)
+
+    @staticmethod
+    def _retry_after(headers) -> Optional[float]:
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            # HTTP-date values are rare here; fall back to exponential backoff
+            pass
+        return None
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing dependency for a while
+
+    After fail_max consecutive failures the breaker opens and callers should
+    fail fast for reset_timeout seconds. It then goes half-open and admits a
+    single probe call: success closes the breaker, another failure re-opens
+    it. A probe that never reports back frees its slot after reset_timeout.
+    """
+
+    def __init__(self, fail_max: int = 10, reset_timeout: float = 30.0):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return (
+            self._opened_at is not None
+            and time.monotonic() - self._opened_at < self.reset_timeout
+        )
+
+    def allow_request(self) -> bool:
+        """Check whether a call may go ahead, claiming the probe slot when half-open"""
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.reset_timeout:
+            return False
+        if (
+            self._probe_started_at is not None
+            and now - self._probe_started_at < self.reset_timeout
+        ):
+            return False
+        self._probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_started_at = None
+        if self._failures >= self.fail_max:
+            if not self.is_open:
+                logger.warning("Circuit breaker opened after %d consecutive failures", self._failures)
+            self._opened_at = time.monotonic()
@@ -3,22 +3,103 @@ OpenAI LLM integration service.
 """
 
 import openai
+from openai.types.chat import ChatCompletion
+import aiohttp
+import httpx
+import asyncio
+import contextlib
+import functools
 import os
-from typing import List, Dict, Any, Optional, Iterator
-from datetime import datetime
+import textwrap
+import time
+import types
+import uuid
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Iterator, Mapping, Tuple
+from datetime import datetime, timezone
 import logging
-import json
+import orjson
+import partial_json_parser
+from llm_cache import LLMCache
+from llm_dispatcher import ParallelLLMDispatcher
+from llm_resilience import CircuitBreaker, RETRYABLE_ERRORS, ServiceBusyError, wait_retry_after
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Handlers and levels come from the server's logging configuration (see main.py)
 logger = logging.getLogger(__name__)
 
+# Map raw HTTP status codes to the OpenAI SDK exceptions so the aiohttp
+# fast path surfaces the same errors as the SDK path
+_STATUS_ERRORS = {
+    400: openai.BadRequestError,
+    401: openai.AuthenticationError,
+    403: openai.PermissionDeniedError,
+    404: openai.NotFoundError,
+    409: openai.ConflictError,
+    422: openai.UnprocessableEntityError,
+    429: openai.RateLimitError,
+}
+
+# Server-Sent Events framing
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def _sse_event(payload: Dict[str, Any]) -> bytes:
+    """Encode a payload as a Server-Sent Events frame"""
+    return _SSE_PREFIX + orjson.dumps(payload) + _SSE_SUFFIX
+
+
+# Lines of the recipe generation query, in prompt order
+_RECIPE_QUERY_FIELDS = (
+    ("ingredients", lambda v: f"Ingredients: {', '.join(sorted(v))}"),
+    ("dietary_preferences", lambda v: f"Dietary preferences: {', '.join(sorted(v))}"),
+    ("allergens", lambda v: f"Allergens to avoid: {', '.join(sorted(v))}"),
+    ("excluded_ingredients", lambda v: f"Excluded ingredients: {', '.join(sorted(v))}"),
+    ("cuisine", lambda v: f"Cuisine preference: {v}"),
+    ("time_limit", lambda v: f"Time limit: {v} minutes"),
+    ("servings", lambda v: f"Servings: {v}"),
+    ("units", lambda v: f"Units: {v}"),
+)
+
+_ENCODER = None
+
+
+def _encoder():
+    """
+    Load the tiktoken encoder on first use and reuse it afterwards
+    
+    The first load may download the encoding, so async code should warm it
+    with load_encoder(). Returns None if the encoder cannot be loaded; the
+    failure is remembered so later calls do not block on it again.
+    """
+    global _ENCODER
+    if _ENCODER is None:
+        try:
+            import tiktoken
+            _ENCODER = tiktoken.encoding_for_model("gpt-4o-mini")
+        except Exception as e:
+            logger.warning("tiktoken encoder unavailable, using heuristic token estimates: %s", e)
+            _ENCODER = False
+    return _ENCODER or None
+
+
+async def load_encoder() -> None:
+    """Load the tiktoken encoder in a worker thread, off the event loop"""
+    if _ENCODER is None:
+        await asyncio.to_thread(_encoder)
+
+
+class RateLimitExceeded(ValueError):
+    """Raised when OpenAI rejects a request for exceeding the rate limit"""
+
 
 class LLMService:
     """Service for OpenAI LLM operations"""
     
     # Culinary Assistant Prompt Template
-    CULINARY_ASSISTANT_PROMPT = """
+    # Kept free of interpolation and always sent as the first message so the
+    # prefix stays byte-identical and qualifies for OpenAI prompt caching
+    CULINARY_ASSISTANT_PROMPT = textwrap.dedent("""
 You are a culinary assistant. 
 Your behavior depends on whether the user provides ingredients:
 
@@ -75,11 +156,39 @@ CASE 2: If the user does NOT provide ingredients
 - Ignore the JSON schema.
 - Respond in normal conversational text (natural language).
 - Provide helpful cooking tips, general recipe ideas, or food-related advice.
-"""
-
+""").strip()
+    
+    # Shared system message so every request starts with the identical prefix
+    _SYSTEM_MESSAGE = {"role": "system", "content": CULINARY_ASSISTANT_PROMPT}
+    
+    # Result returned by validate_parameters for valid parameters; read-only
+    # because the same object is handed to every caller
+    _VALID_PARAMETERS = types.MappingProxyType({"valid": True, "errors": ()})
+    
+    # Conversation history above this many tokens is summarized
+    HISTORY_TOKEN_BUDGET = 1500
+    HISTORY_KEEP_RECENT = 4  # Most recent messages kept verbatim when summarizing
+    HISTORY_SUMMARY_BLOCK = 6  # Messages folded into the summary per step
+    HISTORY_FALLBACK_MESSAGES = 10  # Messages sent when summarization fails
+    SUMMARY_MODEL = "gpt-3.5-turbo"
+    SUMMARY_MAX_TOKENS = 200
+    
+    # How long a connection check result is reused, in seconds
+    CONNECTION_CHECK_TTL = 60.0
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Optionally bypass the SDK and POST non-streaming chats with aiohttp
+        self.use_raw_aiohttp = os.getenv("USE_RAW_AIOHTTP", "0") == "1"
+        self._aiohttp_session: Optional[aiohttp.ClientSession] = None
+        self.cache = LLMCache()
+        # The limits are account-wide, so each worker process takes its share
+        workers = max(1, int(os.getenv("WORKERS", 1)))
+        self.dispatcher = ParallelLLMDispatcher(
+            max_requests_per_minute=int(os.getenv("OPENAI_MAX_RPM", 500)) / workers,
+            max_tokens_per_minute=int(os.getenv("OPENAI_MAX_TPM", 200000)) / workers
+        )
+        self._conn_cache: Optional[Tuple[float, bool]] = None
+        self.breaker = CircuitBreaker(fail_max=10, reset_timeout=30.0)
         self.default_model = "gpt-3.5-turbo"
         self.available_models = [
             {
@@ -95,14 +204,32 @@ CASE 2: If the user does NOT provide ingredients
                 "max_tokens": 8192
             }
         ]
+        self._model_ids = frozenset(m["id"] for m in self.available_models)
+    
+    @functools.cached_property
+    def client(self) -> openai.AsyncOpenAI:
+        """OpenAI client, built on first use"""
+        # The default httpx pool (100 connections, 20 keep-alive) throttles
+        # bursts of concurrent chats, so give the client a wider HTTP/2 pool
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+            http2=True,
+            timeout=httpx.Timeout(60.0)
+        )
+        return openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=http_client
+        )
     
-    def chat_completion(
+    async def chat_completion(
         self,
         message: str,
         model: str = None,
         temperature: float = 0.7,
         max_tokens: int = 150,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        response_format: Optional[Dict[str, str]] = None,
+        cache_validator: Optional[Callable[[str], Any]] = None
     ) -> Dict[str, Any]:
         """
         Generate a chat completion using OpenAI API
@@ -113,116 +240,380 @@ CASE 2: If the user does NOT provide ingredients
             temperature: Model temperature (0.0 to 2.0)
             max_tokens: Maximum tokens to generate
             conversation_history: Previous conversation messages
+            response_format: Optional OpenAI response format, e.g. {"type": "json_object"}
+            cache_validator: Optional check run on the content before it is
+                cached; responses it rejects with a ValueError are not stored
             
         Returns:
             Dictionary containing response data
         """
-        try:
+        with self._map_openai_errors("chat completion"):
             if not self.client.api_key:
                 raise ValueError("OpenAI API key not configured")
             
             # Use default model if not specified
-            if not model:
-                model = self.default_model
+            model = model or self.default_model
             
-            # Build messages array
-            messages = []
-            
-            # Add system prompt first
-            messages.append({
-                "role": "system",
-                "content": self.CULINARY_ASSISTANT_PROMPT
-            })
-            
-            # Add conversation history if provided
-            if conversation_history:
-                for msg in conversation_history[-10:]:  # Limit to last 10 messages
-                    messages.append({
-                        "role": msg["role"],
-                        "content": msg["content"]
-                    })
+            params = {
+                "model": model,
+                "messages": self._build_messages(
+                    message, await self._compact_history(conversation_history)
+                ),
+                "temperature": temperature,
+                "max_tokens": max_tokens
+            }
+            if response_format:
+                params["response_format"] = response_format
             
-            # Add current user message
-            messages.append({
-                "role": "user",
-                "content": message
-            })
+            # Serve deterministic repeats from the response cache
+            cache_key = None
+            if self.cache.is_cacheable(temperature):
+                cache_key = self.cache.make_key(**params)
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Cache hit for %s", model)
+                    return {
+                        "response": cached["response"],
+                        "model_used": cached["model_used"],
+                        "tokens_used": 0,
+                        "cached_tokens": 0,
+                        "cache_hit": True,
+                        "timestamp": datetime.now(timezone.utc)
+                    }
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            response = await self._create_completion(**params)
             
             # Extract response data
-            generated_text = response.choices[0].message.content
+            choice = response.choices[0]
+            generated_text = choice.message.content
             tokens_used = response.usage.total_tokens
+            prompt_details = response.usage.prompt_tokens_details
+            cached_tokens = (prompt_details.cached_tokens or 0) if prompt_details else 0
+            
+            logger.info(
+                "Generated response using %s, tokens: %d, cached prompt tokens: %d",
+                model, tokens_used, cached_tokens
+            )
             
-            logger.info(f"Generated response using {model}, tokens: {tokens_used}")
+            # Only complete responses are cached; truncated or empty output
+            # would otherwise be replayed to every identical request
+            if (
+                cache_key is not None
+                and choice.finish_reason == "stop"
+                and generated_text is not None
+                and self._passes_validation(cache_validator, generated_text)
+            ):
+                await self.cache.set(cache_key, {
+                    "response": generated_text,
+                    "model_used": model
+                })
             
             return {
                 "response": generated_text,
                 "model_used": model,
                 "tokens_used": tokens_used,
-                "timestamp": datetime.utcnow()
+                "cached_tokens": cached_tokens,
+                "cache_hit": False,
+                "timestamp": datetime.now(timezone.utc)
             }
-            
+    
+    @staticmethod
+    def _passes_validation(validator: Optional[Callable[[str], Any]], content: str) -> bool:
+        """Run an optional cache validator, treating a ValueError or TypeError as rejection"""
+        if validator is None:
+            return True
+        try:
+            validator(content)
+        except (ValueError, TypeError):
+            return False
+        return True
+    
+    def _build_messages(
+        self,
+        message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
+        """Build the messages array: system prompt, (compacted) history, user message"""
+        return [
+            self._SYSTEM_MESSAGE,
+            *(conversation_history or ()),
+            {"role": "user", "content": message}
+        ]
+    
+    async def _compact_history(
+        self,
+        conversation_history: Optional[List[Dict[str, str]]],
+        max_tokens: int = None
+    ) -> Optional[List[Dict[str, str]]]:
+        """
+        Summarize older conversation turns once the history exceeds a token budget
+        
+        Messages older than the most recent HISTORY_KEEP_RECENT are folded into
+        a running summary HISTORY_SUMMARY_BLOCK messages at a time, and the
+        rest are kept verbatim. Each step summarizes the previous summary plus
+        one block and is cached on that pair, so a new turn only pays for the
+        block that just aged out. If summarization fails, the last
+        HISTORY_FALLBACK_MESSAGES messages are sent instead.
+        """
+        if not conversation_history:
+            return conversation_history
+        
+        budget = max_tokens or self.HISTORY_TOKEN_BUDGET
+        if sum(self.estimate_tokens(m["content"]) for m in conversation_history) <= budget:
+            return conversation_history
+        
+        # Block boundaries are fixed from the start of the conversation, so
+        # the chain of summaries is the same from one turn to the next
+        aged_out = len(conversation_history) - self.HISTORY_KEEP_RECENT
+        boundary = max(aged_out, 0) // self.HISTORY_SUMMARY_BLOCK * self.HISTORY_SUMMARY_BLOCK
+        if not boundary:
+            return conversation_history
+        
+        summary = None
+        for start in range(0, boundary, self.HISTORY_SUMMARY_BLOCK):
+            block = conversation_history[start:start + self.HISTORY_SUMMARY_BLOCK]
+            summary = await self._summarize_block(summary, block)
+            if summary is None:
+                return conversation_history[-self.HISTORY_FALLBACK_MESSAGES:]
+        
+        return [
+            {"role": "system", "content": f"Summary of prior dialogue: {summary}"},
+            *conversation_history[boundary:]
+        ]
+    
+    async def _summarize_block(
+        self,
+        previous_summary: Optional[str],
+        block: List[Dict[str, str]]
+    ) -> Optional[str]:
+        """Fold a block of messages into the running summary; None on failure"""
+        cache_key = self.cache.make_key(summary_of=block, previous=previous_summary)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached["summary"]
+        
+        # Sent as one transcript so the model summarizes the dialogue
+        # instead of replying to its last turn
+        lines = [f"{m['role']}: {m['content']}" for m in block]
+        if previous_summary:
+            lines.insert(0, f"Summary so far: {previous_summary}")
+        try:
+            response = await self._create_completion(
+                model=self.SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": "Summarize this conversation concisely:"},
+                    {"role": "user", "content": "\n".join(lines)}
+                ],
+                max_tokens=self.SUMMARY_MAX_TOKENS
+            )
+        except openai.APIError as e:
+            logger.warning("History summarization failed, sending recent history only: %s", e)
+            return None
+        
+        summary = response.choices[0].message.content
+        if not summary:
+            logger.warning("History summarization returned no content, sending recent history only")
+            return None
+        await self.cache.set(cache_key, {"summary": summary})
+        logger.info("Summarized %d history messages", len(block))
+        return summary
+    
+    @contextlib.contextmanager
+    def _map_openai_errors(self, operation: str) -> Iterator[None]:
+        """
+        Translate errors raised in the block into ValueErrors with user-facing messages
+        
+        ValueErrors raised by the service itself pass through unchanged.
+        """
+        try:
+            yield
+        except ValueError:
+            raise
         except openai.AuthenticationError:
             logger.error("OpenAI authentication failed")
             raise ValueError("Invalid OpenAI API key")
         except openai.RateLimitError:
             logger.error("OpenAI rate limit exceeded")
-            raise ValueError("Rate limit exceeded. Please try again later.")
+            raise RateLimitExceeded("Rate limit exceeded. Please try again later.")
         except openai.APIError as e:
-            logger.error(f"OpenAI API error: {e}")
+            logger.error("OpenAI API error: %s", e)
             raise ValueError(f"OpenAI API error: {str(e)}")
         except Exception as e:
-            logger.error(f"Unexpected error in chat completion: {e}")
+            logger.error("Unexpected error in %s: %s", operation, e)
             raise ValueError(f"Error generating response: {str(e)}")
     
+    @functools.cached_property
+    def _chat_completions(self) -> Any:
+        """Chat completions resource with SDK retries off; _create_completion retries instead"""
+        return self.client.with_options(max_retries=0).chat.completions
+    
+    async def _create_completion(self, **params: Any) -> Any:
+        """
+        Create a chat completion, retrying transient errors behind the circuit breaker
+        
+        Rate limits, connection errors and 5xx responses are retried with
+        jittered exponential backoff (or the server's Retry-After hint). Once
+        retries keep failing the breaker opens and calls fail fast with
+        ServiceBusyError instead of adding load, until a single probe call
+        gets through. Streaming calls are retried until the stream is opened.
+        """
+        if not self.breaker.allow_request():
+            raise ServiceBusyError("The culinary assistant is busy. Please try again shortly.")
+        
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception_type(RETRYABLE_ERRORS),
+                wait=wait_retry_after(wait_random_exponential(multiplier=1, max=30)),
+                stop=stop_after_attempt(5),
+                reraise=True
+            ):
+                with attempt:
+                    response = await self._send_completion(params)
+        except RETRYABLE_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except openai.APIStatusError:
+            # OpenAI answered, so it is reachable even if it rejected the request
+            self.breaker.record_success()
+            raise
+        
+        self.breaker.record_success()
+        return response
+    
+    async def _send_completion(self, params: Dict[str, Any]) -> Any:
+        """Send one chat completion request via the SDK or raw aiohttp"""
+        if self.use_raw_aiohttp and not params.get("stream"):
+            return await self._raw_chat_completion(params)
+        return await self._chat_completions.create(**params)
+    
+    async def _raw_chat_completion(self, params: Dict[str, Any]) -> ChatCompletion:
+        """
+        POST a chat completion directly with aiohttp
+        
+        Skips the SDK request pipeline on the hot path while still returning
+        a ChatCompletion and raising the SDK exception types on failure.
+        """
+        if self._aiohttp_session is None or self._aiohttp_session.closed:
+            self._aiohttp_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=200),
+                timeout=aiohttp.ClientTimeout(total=60.0)
+            )
+        
+        url = f"{self.client.base_url}chat/completions"
+        request = httpx.Request("POST", url)
+        headers = {"Authorization": f"Bearer {self.client.api_key}"}
+        
+        try:
+            async with self._aiohttp_session.post(url, json=params, headers=headers) as resp:
+                if resp.status >= 400:
+                    # Error bodies from proxies and gateways are often HTML
+                    # or empty, so the status alone decides the exception
+                    try:
+                        body = await resp.json(content_type=None)
+                    except ValueError:
+                        body = None
+                    error = body.get("error") if isinstance(body, dict) else None
+                    message = error.get("message") if isinstance(error, dict) else None
+                    response = httpx.Response(
+                        resp.status, headers=dict(resp.headers), request=request
+                    )
+                    error_class = _STATUS_ERRORS.get(
+                        resp.status,
+                        openai.InternalServerError if resp.status >= 500 else openai.APIStatusError
+                    )
+                    raise error_class(message or resp.reason or "", response=response, body=body)
+                body = await resp.json(content_type=None)
+        except aiohttp.ClientError as e:
+            raise openai.APIConnectionError(message=str(e), request=request)
+        except asyncio.TimeoutError:
+            raise openai.APITimeoutError(request=request)
+        
+        return ChatCompletion.model_validate(body)
+    
+    async def start(self) -> None:
+        """Open the OpenAI client and its connection pool"""
+        # The token encoder is not warmed here: its first load may download
+        # the encoding, which must not hold up startup. generate_recipes_bulk
+        # loads it when exact counts are needed.
+        client = self.client
+        logger.info("OpenAI client ready (base URL %s)", client.base_url)
+    
+    async def close(self) -> None:
+        """Close the shared HTTP connection pools"""
+        # Drop the cached clients too, so a restarted service never reuses a
+        # pool bound to a previous event loop
+        client = self.__dict__.pop("client", None)
+        self.__dict__.pop("_chat_completions", None)
+        if client is not None:
+            await client.close()
+        if self._aiohttp_session is not None:
+            await self._aiohttp_session.close()
+            self._aiohttp_session = None
+    
     def get_available_models(self) -> List[Dict[str, Any]]:
         """Get list of available models"""
         return self.available_models
     
     def validate_model(self, model: str) -> bool:
         """Validate if model is available"""
-        return any(m["id"] == model for m in self.available_models)
+        return model in self._model_ids
     
-    def test_connection(self) -> bool:
-        """Test OpenAI API connection"""
+    async def test_connection(self) -> bool:
+        """Test OpenAI API connection, reusing the result for CONNECTION_CHECK_TTL seconds"""
+        if self._conn_cache is not None:
+            checked_at, connected = self._conn_cache
+            if time.monotonic() - checked_at < self.CONNECTION_CHECK_TTL:
+                return connected
+        
         try:
-            # Make a simple API call to test connection
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": "Hello"}],
-                max_tokens=5
-            )
-            return True
+            # Listing models checks the key and connectivity without billing tokens
+            await self.client.models.list()
+            connected = True
         except Exception as e:
-            logger.error(f"OpenAI connection test failed: {e}")
-            return False
+            logger.error("OpenAI connection test failed: %s", e)
+            connected = False
+        
+        self._conn_cache = (time.monotonic(), connected)
+        return connected
     
-    def estimate_tokens(self, text: str) -> int:
+    def estimate_tokens(self, text: str, exact: bool = False) -> int:
         """
-        Rough estimation of tokens in text
-        (1 token ≈ 4 characters for English text)
+        Estimate the number of tokens in text
+        
+        The default is a cheap heuristic (1 token ≈ 3 characters, a better
+        central estimate than 4 for mixed text). Pass exact=True to count
+        with tiktoken when accuracy matters, e.g. for rate-limit budgeting;
+        it falls back to the heuristic if tiktoken cannot be loaded.
         """
-        return len(text) // 4
+        if exact:
+            encoder = _encoder()
+            if encoder is not None:
+                return len(encoder.encode(text))
+        return len(text) // 3
+    
+    @functools.cached_property
+    def system_prompt_tokens(self) -> int:
+        """Exact token count of the system prompt, computed once"""
+        return self.estimate_tokens(self.CULINARY_ASSISTANT_PROMPT, exact=True)
     
     def validate_parameters(
         self,
         model: str,
         temperature: float,
         max_tokens: int
-    ) -> Dict[str, Any]:
+    ) -> Mapping[str, Any]:
         """
         Validate chat completion parameters
         
         Returns:
-            Dictionary with validation results
+            Mapping with validation results; read-only when the parameters
+            are valid
         """
+        # Fast path for the common case: no per-request allocations
+        if model in self._model_ids and 0.0 <= temperature <= 2.0 and 1 <= max_tokens <= 4000:
+            return self._VALID_PARAMETERS
+        
         errors = []
         
         # Validate model
@@ -242,14 +633,14 @@ CASE 2: If the user does NOT provide ingredients
             "errors": errors
         }
     
-    def chat_completion_stream(
+    async def chat_completion_stream(
         self,
         message: str,
         model: str = None,
         temperature: float = 0.7,
         max_tokens: int = 150,
         conversation_history: Optional[List[Dict[str, str]]] = None
-    ) -> Iterator[str]:
+    ) -> AsyncIterator[bytes]:
         """
         Generate a streaming chat completion using OpenAI API
         
@@ -261,83 +652,128 @@ CASE 2: If the user does NOT provide ingredients
             conversation_history: Previous conversation messages
             
         Yields:
-            Server-Sent Events formatted strings with streaming response data
+            Server-Sent Events frames (bytes) with streaming response data
         """
         try:
-            if not self.client.api_key:
-                raise ValueError("OpenAI API key not configured")
-            
-            # Use default model if not specified
-            if not model:
-                model = self.default_model
-            
-            # Build messages array
-            messages = []
-            
-            # Add system prompt first
-            messages.append({
-                "role": "system",
-                "content": self.CULINARY_ASSISTANT_PROMPT
-            })
-            
-            # Add conversation history if provided
-            if conversation_history:
-                for msg in conversation_history[-10:]:  # Limit to last 10 messages
-                    messages.append({
-                        "role": msg["role"],
-                        "content": msg["content"]
-                    })
-            
-            # Add current user message
-            messages.append({
-                "role": "user",
-                "content": message
-            })
-            
-            # Call OpenAI API with streaming
-            stream = self.client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=True
-            )
-            
-            logger.info(f"Starting streaming response using {model}")
-            
-            # Send initial metadata
-            yield f"data: {json.dumps({'type': 'start', 'model': model, 'timestamp': datetime.utcnow().isoformat()})}\n\n"
-            
-            full_response = ""
-            
-            # Stream the response
-            for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
+            with self._map_openai_errors("streaming chat completion"):
+                if not self.client.api_key:
+                    raise ValueError("OpenAI API key not configured")
+                
+                # Use default model if not specified
+                model = model or self.default_model
+                
+                # Call OpenAI API with streaming
+                stream = await self._create_completion(
+                    model=model,
+                    messages=self._build_messages(
+                        message, await self._compact_history(conversation_history)
+                    ),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+                
+                logger.info("Starting streaming response using %s", model)
+                
+                timestamp = datetime.now(timezone.utc).isoformat()
+                
+                # Send initial metadata
+                yield _sse_event({"type": "start", "model": model, "timestamp": timestamp})
+                
+                parts = []
+                
+                # Stream the response; this loop runs once per token, so frames
+                # are concatenated from bytes rather than formatted as strings
+                async for chunk in stream:
                     content = chunk.choices[0].delta.content
-                    full_response += content
-                    
-                    # Send content chunk
-                    yield f"data: {json.dumps({'type': 'content', 'content': content})}\n\n"
-            
-            # Send completion metadata
-            yield f"data: {json.dumps({'type': 'end', 'full_response': full_response, 'model_used': model, 'timestamp': datetime.utcnow().isoformat()})}\n\n"
-            
-            logger.info(f"Completed streaming response using {model}")
+                    if content is not None:
+                        parts.append(content)
+                
+                        # Send content chunk
+                        yield _SSE_PREFIX + orjson.dumps({"type": "content", "content": content}) + _SSE_SUFFIX
+                
+                # Send completion metadata
+                yield _sse_event({
+                    "type": "end",
+                    "full_response": "".join(parts),
+                    "model_used": model,
+                    "timestamp": timestamp
+                })
+                
+                logger.info("Completed streaming response using %s", model)
             
-        except openai.AuthenticationError:
-            logger.error("OpenAI authentication failed")
-            yield f"data: {json.dumps({'type': 'error', 'error': 'Invalid OpenAI API key'})}\n\n"
-        except openai.RateLimitError:
-            logger.error("OpenAI rate limit exceeded")
-            yield f"data: {json.dumps({'type': 'error', 'error': 'Rate limit exceeded. Please try again later.'})}\n\n"
-        except openai.APIError as e:
-            logger.error(f"OpenAI API error: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'error': f'OpenAI API error: {str(e)}'})}\n\n"
-        except Exception as e:
-            logger.error(f"Unexpected error in streaming chat completion: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'error': f'Error generating response: {str(e)}'})}\n\n"
+        except ValueError as e:
+            yield _sse_event({"type": "error", "error": str(e)})
 
-    def generate_recipes(
+    # Recipe generation settings shared by the direct and Batch API paths
+    RECIPE_MODEL = "gpt-4o-mini"  # Use more capable model for complex JSON generation
+    RECIPE_TEMPERATURE = 0.0  # Deterministic output keeps JSON consistent and cacheable
+    RECIPE_MAX_TOKENS = 2000  # Higher token limit for detailed recipes
+    RECIPE_RESPONSE_FORMAT = {"type": "json_object"}  # Force syntactically valid JSON
+    
+    # Batch statuses after which OpenAI no longer updates the batch
+    BATCH_TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+    
+    @staticmethod
+    def _build_recipe_query(
+        ingredients: List[str],
+        dietary_preferences: Optional[List[str]] = None,
+        allergens: Optional[List[str]] = None,
+        excluded_ingredients: Optional[List[str]] = None,
+        cuisine: Optional[str] = None,
+        time_limit: Optional[int] = None,
+        servings: Optional[int] = None,
+        units: str = "metric"
+    ) -> str:
+        """
+        Build the user query for recipe generation with all parameters
+        
+        List values are sorted so requests that differ only in ordering share
+        a prompt, and with it the prompt and response caches.
+        """
+        values = {
+            "ingredients": ingredients,
+            "dietary_preferences": dietary_preferences,
+            "allergens": allergens,
+            "excluded_ingredients": excluded_ingredients,
+            "cuisine": cuisine,
+            "time_limit": time_limit,
+            "servings": servings,
+            "units": units
+        }
+        return "\n".join(
+            format_value(values[key])
+            for key, format_value in _RECIPE_QUERY_FIELDS
+            if values[key]
+        )
+    
+    @staticmethod
+    def _parse_recipes(content: str) -> List[Dict[str, Any]]:
+        """
+        Parse and validate the recipes JSON returned by the model
+        
+        Raises:
+            orjson.JSONDecodeError: If the content is not valid JSON
+            ValueError: If the JSON does not have the expected structure
+        """
+        recipes_data = orjson.loads(content)
+        
+        # Validate that it has the expected structure
+        if not isinstance(recipes_data, dict):
+            raise ValueError("Response must be a JSON object")
+        
+        if "recipes" not in recipes_data:
+            raise ValueError("Response missing 'recipes' key")
+        
+        if not isinstance(recipes_data["recipes"], list):
+            raise ValueError("'recipes' must be an array")
+        
+        if len(recipes_data["recipes"]) < 2 or len(recipes_data["recipes"]) > 3:
+            raise ValueError("Must have 2-3 recipes")
+        
+        return recipes_data["recipes"]
+    
+    async def generate_recipes(
         self,
         ingredients: List[str],
         dietary_preferences: Optional[List[str]] = None,
@@ -367,93 +803,378 @@ CASE 2: If the user does NOT provide ingredients
             Dictionary containing recipe suggestions and metadata
         """
         try:
-            # Build the user query with all parameters
-            query_parts = [f"Ingredients: {', '.join(ingredients)}"]
-            
-            if dietary_preferences:
-                query_parts.append(f"Dietary preferences: {', '.join(dietary_preferences)}")
-            
-            if allergens:
-                query_parts.append(f"Allergens to avoid: {', '.join(allergens)}")
+            return await self._generate_recipes(
+                ingredients,
+                dietary_preferences=dietary_preferences,
+                allergens=allergens,
+                excluded_ingredients=excluded_ingredients,
+                cuisine=cuisine,
+                time_limit=time_limit,
+                servings=servings,
+                units=units,
+                model=model
+            )
+        except Exception as e:
+            return self._recipe_error(e)
+    
+    async def generate_recipes_stream(
+        self,
+        ingredients: List[str],
+        dietary_preferences: Optional[List[str]] = None,
+        allergens: Optional[List[str]] = None,
+        excluded_ingredients: Optional[List[str]] = None,
+        cuisine: Optional[str] = None,
+        time_limit: Optional[int] = None,
+        servings: Optional[int] = None,
+        units: str = "metric",
+        model: str = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Generate recipe suggestions as a stream, one recipe at a time
+        
+        The JSON response is parsed incrementally so each recipe is sent as
+        soon as the model has finished writing it, instead of after the
+        whole response.
+        
+        Args:
+            Same as generate_recipes
             
-            if excluded_ingredients:
-                query_parts.append(f"Excluded ingredients: {', '.join(excluded_ingredients)}")
+        Yields:
+            Server-Sent Events frames: start, one recipe per recipe, then end
+            with the validated recipe list (or error)
+        """
+        try:
+            with self._map_openai_errors("streaming recipe generation"):
+                if not self.client.api_key:
+                    raise ValueError("OpenAI API key not configured")
+                
+                model = model or self.RECIPE_MODEL
+                user_query = self._build_recipe_query(
+                    ingredients,
+                    dietary_preferences=dietary_preferences,
+                    allergens=allergens,
+                    excluded_ingredients=excluded_ingredients,
+                    cuisine=cuisine,
+                    time_limit=time_limit,
+                    servings=servings,
+                    units=units
+                )
+                
+                stream = await self._create_completion(
+                    model=model,
+                    messages=self._build_messages(user_query),
+                    temperature=self.RECIPE_TEMPERATURE,
+                    max_tokens=self.RECIPE_MAX_TOKENS,
+                    response_format=self.RECIPE_RESPONSE_FORMAT,
+                    stream=True
+                )
+                
+                logger.info("Starting streaming recipes using %s", model)
+                
+                timestamp = datetime.now(timezone.utc).isoformat()
+                yield _sse_event({"type": "start", "model": model, "timestamp": timestamp})
+                
+                parts = []
+                sent = 0
+                
+                async for chunk in stream:
+                    content = chunk.choices[0].delta.content
+                    if not content:
+                        continue
+                    parts.append(content)
+                
+                    # Recipe boundaries can only move when an object opens or closes
+                    if "{" not in content and "}" not in content:
+                        continue
+                
+                    try:
+                        partial = partial_json_parser.loads("".join(parts))
+                    except Exception as e:
+                        await stream.close()
+                        raise orjson.JSONDecodeError(f"Malformed JSON in stream: {e}", "".join(parts), 0)
+                
+                    recipes = partial.get("recipes") if isinstance(partial, dict) else None
+                    if not isinstance(recipes, list):
+                        continue
+                
+                    # Every recipe but the last is complete once a later one has started
+                    while sent < len(recipes) - 1:
+                        yield _sse_event({"type": "recipe", "index": sent, "recipe": recipes[sent]})
+                        sent += 1
+                
+                recipes = self._parse_recipes("".join(parts))
+                for index in range(sent, len(recipes)):
+                    yield _sse_event({"type": "recipe", "index": index, "recipe": recipes[index]})
+                
+                yield _sse_event({
+                    "type": "end",
+                    "recipes": recipes,
+                    "model_used": model,
+                    "timestamp": timestamp
+                })
+                
+                logger.info("Completed streaming recipes using %s", model)
             
-            if cuisine:
-                query_parts.append(f"Cuisine preference: {cuisine}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse JSON response: %s", e)
+            yield _sse_event({"type": "error", "error": "Invalid JSON response from AI model"})
+        except ValueError as e:
+            yield _sse_event({"type": "error", "error": str(e)})
+    
+    async def generate_recipes_bulk(
+        self,
+        ingredient_sets: List[List[str]],
+        max_concurrent: int = 20,
+        **options: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate recipes for many ingredient sets concurrently
+        
+        Requests are throttled to the configured requests- and tokens-per-minute
+        limits and retried with backoff when OpenAI rate limits them.
+        
+        Args:
+            ingredient_sets: One list of ingredients per recipe request
+            max_concurrent: Maximum number of requests in flight
+            **options: Other generate_recipes arguments, shared by every request
             
-            if time_limit:
-                query_parts.append(f"Time limit: {time_limit} minutes")
+        Returns:
+            One generate_recipes result per ingredient set, in order
+        """
+        # Exact token budgeting needs tiktoken; never load it on the event loop
+        await load_encoder()
+        
+        query_options = {k: v for k, v in options.items() if k != "model"}
+        calls = []
+        
+        for ingredients in ingredient_sets:
+            estimated_tokens = (
+                self.system_prompt_tokens
+                + self.estimate_tokens(self._build_recipe_query(ingredients, **query_options), exact=True)
+                + self.RECIPE_MAX_TOKENS
+            )
+            calls.append((
+                functools.partial(self._generate_recipes, ingredients, **options),
+                estimated_tokens
+            ))
+        
+        results = await self.dispatcher.run_many(calls, max_concurrent=max_concurrent)
+        
+        return [
+            self._recipe_error(result) if isinstance(result, Exception) else result
+            for result in results
+        ]
+    
+    async def _generate_recipes(
+        self,
+        ingredients: List[str],
+        dietary_preferences: Optional[List[str]] = None,
+        allergens: Optional[List[str]] = None,
+        excluded_ingredients: Optional[List[str]] = None,
+        cuisine: Optional[str] = None,
+        time_limit: Optional[int] = None,
+        servings: Optional[int] = None,
+        units: str = "metric",
+        model: str = None
+    ) -> Dict[str, Any]:
+        """Generate recipes, raising on API errors instead of returning them"""
+        user_query = self._build_recipe_query(
+            ingredients,
+            dietary_preferences=dietary_preferences,
+            allergens=allergens,
+            excluded_ingredients=excluded_ingredients,
+            cuisine=cuisine,
+            time_limit=time_limit,
+            servings=servings,
+            units=units
+        )
+        
+        # Use a higher max_tokens for recipe generation and lower temperature for consistency
+        response = await self.chat_completion(
+            message=user_query,
+            model=model or self.RECIPE_MODEL,
+            temperature=self.RECIPE_TEMPERATURE,
+            max_tokens=self.RECIPE_MAX_TOKENS,
+            response_format=self.RECIPE_RESPONSE_FORMAT,
+            cache_validator=self._parse_recipes
+        )
+        
+        # Try to parse the JSON response
+        try:
+            recipes = self._parse_recipes(response["response"])
             
-            if servings:
-                query_parts.append(f"Servings: {servings}")
+            # Return successful response with parsed JSON
+            return {
+                "success": True,
+                "recipes": recipes,
+                "model_used": response["model_used"],
+                "tokens_used": response["tokens_used"],
+                "cached_tokens": response["cached_tokens"],
+                "cache_hit": response["cache_hit"],
+                "timestamp": response["timestamp"],
+                "query_parameters": {
+                    "ingredients": ingredients,
+                    "dietary_preferences": dietary_preferences,
+                    "allergens": allergens,
+                    "excluded_ingredients": excluded_ingredients,
+                    "cuisine": cuisine,
+                    "time_limit": time_limit,
+                    "servings": servings,
+                    "units": units
+                }
+            }
             
-            query_parts.append(f"Units: {units}")
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse JSON response: %s", e)
+            return {
+                "success": False,
+                "error": "Invalid JSON response from AI model",
+                "raw_response": response["response"],
+                "model_used": response["model_used"],
+                "tokens_used": response["tokens_used"],
+                "timestamp": response["timestamp"]
+            }
+    
+    @staticmethod
+    def _recipe_error(e: Exception) -> Dict[str, Any]:
+        """Build the failure result returned by the recipe generators"""
+        logger.error("Error generating recipes: %s", e)
+        return {
+            "success": False,
+            "error": str(e),
+            "timestamp": datetime.now(timezone.utc)
+        }
+    
+    async def generate_recipes_batch(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Submit recipe generations to the OpenAI Batch API
+        
+        Batch jobs cost half as much as direct calls and run against a
+        separate rate limit, but complete asynchronously within 24 hours.
+        
+        Args:
+            requests: Keyword arguments for generate_recipes, one dict per recipe request
             
-            user_query = "\n".join(query_parts)
+        Returns:
+            Dictionary with the batch id, its status and the custom id of each request
+        """
+        with self._map_openai_errors("recipe batch submission"):
+            custom_ids = []
+            lines = []
             
-            # Use a higher max_tokens for recipe generation and lower temperature for consistency
-            response = self.chat_completion(
-                message=user_query,
-                model=model or "gpt-4o-mini",  # Use more capable model for complex JSON generation
-                temperature=0.3,  # Lower temperature for more consistent JSON output
-                max_tokens=2000,  # Higher token limit for detailed recipes
-                conversation_history=[
-                    {
-                        "role": "system",
-                        "content": self.CULINARY_ASSISTANT_PROMPT
+            for params in requests:
+                query_params = dict(params)
+                model = query_params.pop("model", None) or self.RECIPE_MODEL
+                custom_id = str(uuid.uuid4())
+                custom_ids.append(custom_id)
+                
+                lines.append(orjson.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": model,
+                        "messages": self._build_messages(self._build_recipe_query(**query_params)),
+                        "temperature": self.RECIPE_TEMPERATURE,
+                        "max_tokens": self.RECIPE_MAX_TOKENS,
+                        "response_format": self.RECIPE_RESPONSE_FORMAT
                     }
-                ]
+                }))
+            
+            batch_file = await self.client.files.create(
+                file=("recipes.jsonl", b"\n".join(lines)),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
             )
             
-            # Try to parse the JSON response
-            try:
-                recipes_data = json.loads(response["response"])
-                
-                # Validate that it has the expected structure
-                if "recipes" not in recipes_data:
-                    raise ValueError("Response missing 'recipes' key")
-                
-                if not isinstance(recipes_data["recipes"], list):
-                    raise ValueError("'recipes' must be an array")
-                
-                if len(recipes_data["recipes"]) < 2 or len(recipes_data["recipes"]) > 3:
-                    raise ValueError("Must have 2-3 recipes")
-                
-                # Return successful response with parsed JSON
-                return {
-                    "success": True,
-                    "recipes": recipes_data["recipes"],
-                    "model_used": response["model_used"],
-                    "tokens_used": response["tokens_used"],
-                    "timestamp": response["timestamp"],
-                    "query_parameters": {
-                        "ingredients": ingredients,
-                        "dietary_preferences": dietary_preferences,
-                        "allergens": allergens,
-                        "excluded_ingredients": excluded_ingredients,
-                        "cuisine": cuisine,
-                        "time_limit": time_limit,
-                        "servings": servings,
-                        "units": units
-                    }
-                }
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {e}")
-                return {
-                    "success": False,
-                    "error": "Invalid JSON response from AI model",
-                    "raw_response": response["response"],
-                    "model_used": response["model_used"],
-                    "tokens_used": response["tokens_used"],
-                    "timestamp": response["timestamp"]
-                }
+            logger.info("Submitted recipe batch %s with %d requests", batch.id, len(lines))
             
-        except Exception as e:
-            logger.error(f"Error generating recipes: {e}")
             return {
+                "batch_id": batch.id,
+                "status": batch.status,
+                "custom_ids": custom_ids
+            }
+    
+    async def get_recipes_batch(self, batch_id: str) -> Dict[str, Any]:
+        """
+        Get the status of a recipe batch, with parsed results once it has finished
+        
+        Returns:
+            Dictionary with the batch status and, for finished batches, one
+            result per request keyed by its custom id
+        """
+        with self._map_openai_errors("recipe batch retrieval"):
+            batch = await self.client.batches.retrieve(batch_id)
+            return await self._collect_batch_results(batch)
+    
+    async def wait_for_recipes_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = 60.0
+    ) -> Dict[str, Any]:
+        """Poll a recipe batch until it finishes and return its results"""
+        with self._map_openai_errors("recipe batch retrieval"):
+            while True:
+                batch = await self.client.batches.retrieve(batch_id)
+                if batch.status in self.BATCH_TERMINAL_STATUSES:
+                    return await self._collect_batch_results(batch)
+                await asyncio.sleep(poll_interval)
+    
+    async def _collect_batch_results(self, batch: Any) -> Dict[str, Any]:
+        """Download and parse the output and error files of a finished batch"""
+        results = None
+        
+        if batch.status in self.BATCH_TERMINAL_STATUSES:
+            results = []
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if not file_id:
+                    continue
+                content = await self.client.files.content(file_id)
+                for line in content.text.splitlines():
+                    if line.strip():
+                        results.append(self._parse_batch_line(line))
+        
+        return {
+            "batch_id": batch.id,
+            "status": batch.status,
+            "results": results
+        }
+    
+    def _parse_batch_line(self, line: str) -> Dict[str, Any]:
+        """Parse one line of a batch output file through the recipe validation"""
+        item = orjson.loads(line)
+        custom_id = item["custom_id"]
+        response = item.get("response") or {}
+        
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or response.get("body", {}).get("error") or {}
+            return {
+                "custom_id": custom_id,
+                "success": False,
+                "error": error.get("message", "Batch request failed")
+            }
+        
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            return {
+                "custom_id": custom_id,
+                "success": True,
+                "recipes": self._parse_recipes(content)
+            }
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse JSON response: %s", e)
+            return {
+                "custom_id": custom_id,
+                "success": False,
+                "error": "Invalid JSON response from AI model"
+            }
+        except (KeyError, IndexError, ValueError) as e:
+            return {
+                "custom_id": custom_id,
                 "success": False,
-                "error": str(e),
-                "timestamp": datetime.utcnow()
+                "error": str(e)
             }
@@ -8,18 +8,51 @@ A modular FastAPI backend for practicing LLM integration with OpenAI.
 from dotenv import load_dotenv
 load_dotenv()
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+import copy
+import logging
 import os
+from uvicorn.config import LOGGING_CONFIG
+from llm_service import LLMService
 from routes import router
 
+logger = logging.getLogger(__name__)
+
+# Uvicorn's logging config, extended so application loggers (logger.info in
+# llm_service and friends) go through Uvicorn's handler instead of a second
+# root handler configured at import time. Applied only by `python main.py`;
+# `uvicorn main:app` and Gunicorn use their own logging configuration.
+LOG_CONFIG = copy.deepcopy(LOGGING_CONFIG)
+LOG_CONFIG["root"] = {"handlers": ["default"], "level": "INFO"}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared LLM service on startup and close its connection pools on shutdown"""
+    llm = LLMService()
+    await llm.start()
+    app.state.llm = llm
+    logger.info("LLM Practice API is ready!")
+    logger.info("API Documentation: http://localhost:8000/docs")
+    try:
+        yield
+    finally:
+        await llm.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Axium interview prototype",
     description="",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -31,10 +64,14 @@ app.add_middleware(
         "http://localhost:5173",  # Vite dev server
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+# Compress JSON responses such as recipe payloads; streaming routes opt out
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 # Include API routes
 app.include_router(router, prefix="/api/v1")
 
@@ -50,15 +87,6 @@ async def root():
         "api_prefix": "/api/v1"
     }
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    # create_tables()
-    # print("✅ Database tables created successfully")
-    print("🚀 LLM Practice API is ready!")
-    print(f"📚 API Documentation: http://localhost:8000/docs")
-
 if __name__ == "__main__":
     import uvicorn
     
@@ -67,9 +95,21 @@ if __name__ == "__main__":
     port = int(os.getenv("API_PORT", 8000))
     debug = os.getenv("DEBUG", "True").lower() == "true"
     
+    # LLM calls are I/O-bound: each worker multiplexes many concurrent chats on
+    # one event loop, so size WORKERS for the expected number of open sockets
+    # rather than strictly by CPU count. Reload only works with a single worker.
+    workers = 1 if debug else int(os.getenv("WORKERS", os.cpu_count() or 1))
+    # Worker processes inherit this and split the OpenAI rate limits by it
+    os.environ["WORKERS"] = str(workers)
+    
     uvicorn.run(
         "main:app", 
+        host=host,
         port=port,
         reload=debug,
-        log_level="info"
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        log_level="info",
+        log_config=LOG_CONFIG
     )
@@ -2,17 +2,29 @@
 Pydantic models for data validation and serialization.
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Dict, Any
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    """Current time as a timezone-aware UTC datetime"""
+    return datetime.now(timezone.utc)
+
+
+# Request bodies are immutable and reject unknown fields
+REQUEST_MODEL_CONFIG = ConfigDict(frozen=True, extra="forbid")
 
 
 class ChatRequest(BaseModel):
     """Request model for chat completion"""
+    model_config = REQUEST_MODEL_CONFIG
+    
     message: str = Field(..., min_length=1, description="User message")
     model: str = Field(default="gpt-4o-mini", description="OpenAI model to use")
     temperature: float = Field(default=0.7, ge=0.0, le=2.0, description="Model temperature")
     max_tokens: int = Field(default=150, ge=1, le=4000, description="Maximum tokens to generate")
+    stream: bool = Field(default=False, description="Client-side flag for streaming mode; the endpoint decides")
 
 
 class ChatResponse(BaseModel):
@@ -20,7 +32,55 @@ class ChatResponse(BaseModel):
     response: str = Field(..., description="Generated response")
     model_used: str = Field(..., description="Model used for generation")
     tokens_used: int = Field(..., description="Total tokens consumed")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Response timestamp")
+    cached_tokens: int = Field(default=0, description="Prompt tokens served from OpenAI's prompt cache")
+    cache_hit: bool = Field(default=False, description="Whether the response was served from cache")
+    timestamp: datetime = Field(default_factory=utc_now, description="Response timestamp")
+
+
+class RecipeRequest(BaseModel):
+    """Request model for recipe generation"""
+    model_config = REQUEST_MODEL_CONFIG
+    
+    ingredients: List[str] = Field(..., min_length=1, description="Available ingredients")
+    dietary_preferences: Optional[List[str]] = Field(default=None, description="Dietary preferences")
+    allergens: Optional[List[str]] = Field(default=None, description="Allergens to avoid")
+    excluded_ingredients: Optional[List[str]] = Field(default=None, description="Ingredients to exclude")
+    cuisine: Optional[str] = Field(default=None, description="Cuisine preference")
+    time_limit: Optional[int] = Field(default=None, ge=1, description="Cooking time limit in minutes")
+    servings: Optional[int] = Field(default=None, ge=1, description="Number of servings")
+    units: str = Field(default="metric", description="Unit system (metric or US)")
+    model: Optional[str] = Field(default=None, description="OpenAI model to use")
+
+
+class RecipeBatchRequest(BaseModel):
+    """Request model for Batch API recipe generation"""
+    model_config = REQUEST_MODEL_CONFIG
+    
+    requests: List[RecipeRequest] = Field(..., min_length=1, description="Recipe requests to batch")
+
+
+class RecipeBatchResponse(BaseModel):
+    """Response model for a submitted recipe batch"""
+    batch_id: str = Field(..., description="OpenAI batch id")
+    status: str = Field(..., description="Batch status")
+    custom_ids: List[str] = Field(..., description="Custom id of each request, in request order")
+    timestamp: datetime = Field(default_factory=utc_now)
+
+
+class RecipeBatchResult(BaseModel):
+    """Result of one request in a recipe batch"""
+    custom_id: str
+    success: bool
+    recipes: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+
+
+class RecipeBatchStatusResponse(BaseModel):
+    """Response model for recipe batch status and results"""
+    batch_id: str
+    status: str
+    results: Optional[List[RecipeBatchResult]] = None
+    timestamp: datetime = Field(default_factory=utc_now)
 
 
 class ModelInfo(BaseModel):
@@ -40,7 +100,7 @@ class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     service: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
 
 
 class StatusResponse(BaseModel):
@@ -49,11 +109,11 @@ class StatusResponse(BaseModel):
     openai_connected: bool
     database_connected: bool
     message: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
 
 
 class ErrorResponse(BaseModel):
     """Error response model"""
     error: str
     detail: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
@@ -2,26 +2,43 @@
 API route definitions for the LLM Practice backend.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from typing import List, Optional
-import uuid
 from models import (
         ChatRequest, ChatResponse, 
-        ModelsResponse, HealthResponse, StatusResponse, ErrorResponse
+        RecipeRequest, RecipeBatchRequest, RecipeBatchResponse, RecipeBatchStatusResponse,
+        ModelsResponse, HealthResponse, StatusResponse
     )
-from llm_service import LLMService
+from llm_service import LLMService, RateLimitExceeded
+from llm_resilience import ServiceBusyError
 
 # Create router
 router = APIRouter()
 
-# Initialize LLM service
-llm_service = LLMService()
+# Headers for streaming responses. CORS headers come from CORSMiddleware; the
+# explicit identity encoding keeps GZipMiddleware from buffering chunks.
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "Content-Encoding": "identity",
+}
+
+
+async def get_llm_service(request: Request) -> LLMService:
+    """
+    Get the LLM service created by the application lifespan
+    
+    One instance per process so every request shares the same AsyncOpenAI
+    client and its connection pool.
+    """
+    return request.app.state.llm
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_completion(request: ChatRequest):
+async def chat_completion(
+    request: ChatRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
     """Generate a chat completion using OpenAI"""
     try:
         # Validate parameters
@@ -35,7 +52,7 @@ async def chat_completion(request: ChatRequest):
             )
         
         # Generate response using LLM service (no history context)
-        response_data = llm_service.chat_completion(
+        response_data = await llm_service.chat_completion(
             message=request.message,
             model=request.model,
             temperature=request.temperature,
@@ -47,9 +64,15 @@ async def chat_completion(request: ChatRequest):
             response=response_data["response"],
             model_used=response_data["model_used"],
             tokens_used=response_data["tokens_used"],
+            cached_tokens=response_data["cached_tokens"],
+            cache_hit=response_data["cache_hit"],
             timestamp=response_data["timestamp"]
         )
         
+    except ServiceBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -57,7 +80,10 @@ async def chat_completion(request: ChatRequest):
 
 
 @router.post("/chat/stream")
-async def chat_completion_stream(request: ChatRequest):
+async def chat_completion_stream(
+    request: ChatRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
     """Generate a streaming chat completion using OpenAI"""
     try:
         # Validate parameters
@@ -71,24 +97,20 @@ async def chat_completion_stream(request: ChatRequest):
             )
         
         # Generate streaming response using LLM service
-        def generate_stream():
-            return llm_service.chat_completion_stream(
+        async def generate_stream():
+            async for chunk in llm_service.chat_completion_stream(
                 message=request.message,
                 model=request.model,
                 temperature=request.temperature,
                 max_tokens=request.max_tokens,
                 conversation_history=[]  # No history
-            )
+            ):
+                yield chunk
         
         return StreamingResponse(
             generate_stream(),
             media_type="text/plain",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "*",
-            }
+            headers=STREAM_HEADERS
         )
         
     except ValueError as e:
@@ -97,8 +119,93 @@ async def chat_completion_stream(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Error generating streaming response: {str(e)}")
 
 
+@router.post("/recipes/stream")
+async def generate_recipes_stream(
+    request: RecipeRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """Generate recipe suggestions, streaming each recipe as it completes"""
+    try:
+        if request.model and not llm_service.validate_model(request.model):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid parameters: Invalid model: {request.model}"
+            )
+        
+        return StreamingResponse(
+            llm_service.generate_recipes_stream(**request.model_dump()),
+            media_type="text/plain",
+            headers=STREAM_HEADERS
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating streaming recipes: {str(e)}")
+
+
+@router.post("/recipes/batch", response_model=RecipeBatchResponse)
+async def create_recipes_batch(
+    request: RecipeBatchRequest,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """Submit recipe requests to the OpenAI Batch API for async retrieval"""
+    try:
+        invalid_models = sorted({
+            r.model for r in request.requests
+            if r.model and not llm_service.validate_model(r.model)
+        })
+        if invalid_models:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid parameters: Invalid model: {', '.join(invalid_models)}"
+            )
+        
+        batch_data = await llm_service.generate_recipes_batch(
+            [r.model_dump() for r in request.requests]
+        )
+        
+        return RecipeBatchResponse(
+            batch_id=batch_data["batch_id"],
+            status=batch_data["status"],
+            custom_ids=batch_data["custom_ids"]
+        )
+        
+    except HTTPException:
+        raise
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error submitting recipe batch: {str(e)}")
+
+
+@router.get("/recipes/batch/{batch_id}", response_model=RecipeBatchStatusResponse)
+async def get_recipes_batch(
+    batch_id: str,
+    llm_service: LLMService = Depends(get_llm_service)
+):
+    """Get the status of a recipe batch and its results once finished"""
+    try:
+        batch_data = await llm_service.get_recipes_batch(batch_id)
+        
+        return RecipeBatchStatusResponse(
+            batch_id=batch_data["batch_id"],
+            status=batch_data["status"],
+            results=batch_data["results"]
+        )
+        
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching recipe batch: {str(e)}")
+
+
 @router.get("/models", response_model=ModelsResponse)
-async def get_available_models():
+async def get_available_models(llm_service: LLMService = Depends(get_llm_service)):
     """Get list of available models"""
     try:
         models = llm_service.get_available_models()
@@ -118,11 +225,11 @@ async def health_check():
 
 
 @router.get("/status", response_model=StatusResponse)
-async def api_status():
+async def api_status(llm_service: LLMService = Depends(get_llm_service)):
     """Check API status including external dependencies"""
     try:
         # Test OpenAI connection
-        openai_connected = llm_service.test_connection()
+        openai_connected = await llm_service.test_connection()
         
         # No database needed anymore
         database_connected = True
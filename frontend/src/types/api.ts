@@ -12,6 +12,8 @@ export interface ChatResponse {
   response: string;
   model_used: string;
   tokens_used: number;
+  cached_tokens?: number;
+  cache_hit?: boolean;
   timestamp: string;
 }
 